@@ -89,7 +89,10 @@ class MainService:
 
     async def run(self):
         # Run the triggers
-        return await self.trigger_service.trigger_event(self.event)
+        try:
+            return await self.trigger_service.trigger_event(self.event)
+        finally:
+            await self.platform_service.aclose()
 
     def get_repo_path(self):
         raise NotImplementedError
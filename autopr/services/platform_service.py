@@ -1,22 +1,109 @@
 import asyncio
 import base64
-import json
 import os
 import sys
+import time
 import traceback
-from typing import Optional, Union, Any, Type
+from typing import (
+    Optional,
+    Union,
+    Any,
+    Type,
+    Callable,
+    Awaitable,
+    TypeVar,
+    AsyncIterator,
+    Coroutine,
+)
 
 import aiohttp
+import orjson
 import requests
-from aiohttp import ClientSession
+from aiohttp import ClientSession, TCPConnector
 from git import GitCommandError
 from git.repo import Repo
+from yarl import URL
 
 from autopr.log_config import get_logger
 from autopr.models.artifacts import Issue, Message, PullRequest
 from autopr.models.events import EventUnion, LabelEvent, CommentEvent, PushEvent, CronEvent
 from datetime import datetime
 
+T = TypeVar("T")
+
+CONVERT_PR_TO_DRAFT_QUERY = """
+    mutation ConvertPullRequestToDraft($pullRequestId: ID!) {
+      convertPullRequestToDraft(input: { pullRequestId: $pullRequestId }) {
+        clientMutationId
+      }
+    }
+"""
+
+MARK_PR_READY_FOR_REVIEW_QUERY = """
+    mutation MarkPullRequestReadyForReview($pullRequestId: ID!) {
+      markPullRequestReadyForReview(input: { pullRequestId: $pullRequestId }) {
+        clientMutationId
+      }
+    }
+"""
+
+# Lists issues with their comments, a page at a time
+GET_ISSUES_QUERY = """
+    query GetIssues(
+      $owner: String!
+      $name: String!
+      $pageSize: Int!
+      $states: [IssueState!]
+      $since: DateTime
+      $cursor: String
+    ) {
+      repository(owner: $owner, name: $name) {
+        issues(
+          first: $pageSize
+          after: $cursor
+          states: $states
+          filterBy: { since: $since }
+          orderBy: { field: CREATED_AT, direction: DESC }
+        ) {
+          pageInfo {
+            hasNextPage
+            endCursor
+          }
+          nodes {
+            number
+            title
+            state
+            body
+            updatedAt
+            author {
+              __typename
+              login
+            }
+            comments(first: $pageSize) {
+              pageInfo {
+                hasNextPage
+              }
+              nodes {
+                body
+                author {
+                  __typename
+                  login
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+"""
+
+# REST issue state -> GraphQL issue states
+ISSUE_STATES = {
+    "open": ["OPEN"],
+    "closed": ["CLOSED"],
+    "all": ["OPEN", "CLOSED"],
+}
+
 
 class PlatformService:
     """
@@ -79,6 +166,23 @@ class PlatformService:
         """
         raise NotImplementedError
 
+    async def get_issues_iter(
+        self, state: Optional[str] = None, since: Optional[datetime] = None
+    ) -> AsyncIterator[Issue]:
+        """
+        Iterate over issues as they are fetched, in no particular order.
+        Useful to start working on issues before all of them are fetched.
+
+        Parameters
+        ----------
+        state: str
+            The state of the issues to get. Can be "open", "closed", or "all".
+        since: datetime
+            The date to get issues since. If None, get all issues.
+        """
+        for issue in await self.get_issues(state=state, since=since):
+            yield issue
+
     async def find_existing_pr(self, head_branch: str, base_branch: str) -> Optional[int]:
         """
         Find an existing pull request.
@@ -92,7 +196,7 @@ class PlatformService:
 
     async def create_pr(
         self, title: str, bodies: list[str], draft: bool, head_branch: str, base_branch: str
-    ) -> tuple[Optional[int], list[Union[str, Type[PRBodySentinel]]]]:
+    ) -> tuple[Optional[int], list[Union[str, Type[PRBodySentinel], asyncio.Future[str]]]]:
         """
         Create a pull request.
 
@@ -108,6 +212,12 @@ class PlatformService:
             The head branch of the PR
         base_branch: str
             The base branch of the PR
+
+        Returns
+        -------
+        tuple[Optional[int], list[Union[str, Type[PRBodySentinel], asyncio.Future[str]]]]
+            The PR number, and an ID for each body: `PRBodySentinel` for the PR description,
+            and for the rest a comment ID, or a future of one if the comment is still being posted
         """
         raise NotImplementedError
 
@@ -300,6 +410,12 @@ class PlatformService:
         """
         raise NotImplementedError
 
+    async def aclose(self) -> None:
+        """
+        Release any resources held by the service (e.g., open connections).
+        """
+        pass
+
 
 class GitHubPlatformService(PlatformService):
     """
@@ -310,6 +426,22 @@ class GitHubPlatformService(PlatformService):
 
     """
 
+    # Maximum number of requests in flight at once
+    max_concurrent_requests = 32
+    # Maximum number of those that fetch issue comments, leaving room for other requests
+    max_concurrent_comment_requests = 16
+    # How many times to retry a rate limited request, and the longest wait (in seconds) to accept
+    max_rate_limit_retries = 3
+    max_rate_limit_wait = 60
+    # How long (in seconds) to trust a cached `find_existing_pr` result
+    pr_cache_ttl = 60
+    # Items per page when listing, GitHub's maximum is 100
+    page_size = 100
+    # How many parsed issues and pull requests to keep around
+    model_cache_size = 256
+    # How many conditional GET results to keep around
+    etag_cache_size = 256
+
     def __init__(
         self,
         token: str,
@@ -323,8 +455,39 @@ class GitHubPlatformService(PlatformService):
             repo=repo,
         )
         self.token = token
-
-        self._pr_node_id: Optional[str] = None
+        self._headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+        self._graphql_headers = self._headers | {"Content-Type": "application/json"}
+
+        repo_url = f"https://api.github.com/repos/{owner}/{repo_name}"
+        self._pulls_url = f"{repo_url}/pulls"
+        self._issues_url = f"{repo_url}/issues"
+
+        # Shared across all requests to keep connections alive, created lazily inside the event loop
+        self._session: Optional[ClientSession] = None
+        self._request_semaphore: Optional[asyncio.Semaphore] = None
+        self._comments_semaphore: Optional[asyncio.Semaphore] = None
+        self._background_tasks: set[asyncio.Task[Any]] = set()
+        self._background_errors: list[BaseException] = []
+        # (url, params) -> (ETag, parsed body, Link header URLs by rel) of the last response,
+        # for conditional requests, in least recently used order
+        self._etag_cache: dict[
+            tuple[str, tuple[tuple[str, str], ...]], tuple[str, Any, dict[str, str]]
+        ] = {}
+
+        # PR number -> GraphQL node ID
+        self._pr_node_ids: dict[int, str] = {}
+        # PR number -> last known draft status
+        self._pr_draft_statuses: dict[int, bool] = {}
+        # (head branch, base branch) -> (time of lookup, open PR number)
+        self._pr_cache: dict[tuple[str, str], tuple[float, Optional[int]]] = {}
+        # (kind, number, updated_at) -> parsed issue or pull request, in least recently used order
+        self._model_cache: dict[tuple[str, int, str], Issue] = {}
+        # Comment ID -> number of the issue it was published on
+        self._comment_issue_numbers: dict[str, int] = {}
 
         self._drafts_supported = True
 
@@ -337,10 +500,11 @@ class GitHubPlatformService(PlatformService):
         request_params: Optional[dict[str, Any]] = None,
         request_body: Optional[dict[str, Any]] = None,
     ):
+        text = await response.text()
         try:
-            text = await response.json()
-        except json.JSONDecodeError:
-            text = await response.text()
+            text = orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
 
         self.log.error(
             reason,
@@ -353,42 +517,222 @@ class GitHubPlatformService(PlatformService):
             response_headers=response.headers,
         )
 
-    def _get_headers(self):
-        return {
-            "Authorization": f"Bearer {self.token}",
-            "Accept": "application/vnd.github+json",
-            "X-GitHub-Api-Version": "2022-11-28",
-        }
+    async def _get_session(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                json_serialize=lambda obj: orjson.dumps(obj).decode(),
+                # Every request goes to the same host, so size the pool to the concurrency limit
+                # to keep one warm connection per in-flight request
+                connector=TCPConnector(
+                    limit=self.max_concurrent_requests,
+                    keepalive_timeout=75,
+                    ttl_dns_cache=300,
+                ),
+            )
+            self._request_semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+            self._comments_semaphore = asyncio.Semaphore(self.max_concurrent_comment_requests)
+        return self._session
 
-    async def find_existing_pr(self, head_branch: str, base_branch: str) -> Optional[int]:
+    async def _request(self, method: str, url: str, **kwargs: Any) -> aiohttp.ClientResponse:
         """
-        Returns the PR dict of the first open pull request with the same head and base branches
+        Make a request with the shared session, bounding concurrency and
+        waiting out GitHub's rate limits.
+
+        The response body is read before the connection is released,
+        so `response.read()` and `response.text()` can be awaited afterwards.
         """
+        session = await self._get_session()
+        assert self._request_semaphore is not None
+        attempt = 0
+        while True:
+            async with self._request_semaphore:
+                # Reading the whole body hands the connection back to the pool,
+                # without closing the response like leaving `async with` would
+                response = await session.request(method, url, **kwargs)
+                await response.read()
+
+            delay = self._get_rate_limit_delay(response, attempt)
+            if (
+                delay is None
+                or attempt >= self.max_rate_limit_retries
+                or delay > self.max_rate_limit_wait
+            ):
+                return response
+
+            self.log.warning(
+                "Rate limited by GitHub, retrying",
+                request_url=url,
+                response_code=response.status,
+                delay=delay,
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
 
-        url = f"https://api.github.com/repos/{self.owner}/{self.repo_name}/pulls"
-        headers = self._get_headers()
-        params = {"state": "open", "head": f"{self.owner}:{head_branch}", "base": base_branch}
+    async def _conditional_get(
+        self, url: str, **kwargs: Any
+    ) -> tuple[aiohttp.ClientResponse, Optional[tuple[Any, dict[str, str]]]]:
+        """
+        GET with `If-None-Match`, reusing the previous result if GitHub answers 304 Not Modified.
+        Requests answered with 304 don't count against the rate limit.
 
-        async with ClientSession() as session:
-            async with session.get(url, headers=headers, params=params) as response:
-                if response.status == 200:
-                    prs = await response.json()
-                    if prs:
-                        return prs[0]["number"]
+        Returns the response, and its parsed body and Link header URLs by rel,
+        or None instead of those if the request failed.
+        The parsed body may be shared with later calls, so it must not be modified.
+        """
+        params = kwargs.get("params") or {}
+        cache_key = (url, tuple(sorted((key, str(value)) for key, value in params.items())))
+        cached = self._etag_cache.pop(cache_key, None)
+        if cached is not None:
+            self._etag_cache[cache_key] = cached
+            kwargs["headers"] = kwargs.get("headers", {}) | {"If-None-Match": cached[0]}
+
+        response = await self._request("GET", url, **kwargs)
+        if response.status == 304 and cached is not None:
+            return response, cached[1:]
+        if response.status != 200:
+            return response, None
+
+        body = orjson.loads(await response.read())
+        links = {rel: str(link["url"]) for rel, link in response.links.items()}
+        if "ETag" in response.headers:
+            self._etag_cache[cache_key] = (response.headers["ETag"], body, links)
+            while len(self._etag_cache) > self.etag_cache_size:
+                del self._etag_cache[next(iter(self._etag_cache))]
+        return response, (body, links)
+
+    async def _get_all_pages(
+        self,
+        url: str,
+        params: dict[str, Any],
+        failure_reason: str,
+        process_page: Callable[[list[Any]], Awaitable[T]],
+    ) -> Optional[list[T]]:
+        """
+        Get all pages of a paginated list endpoint, and process each page's items
+        as soon as that page arrives, so processing overlaps with fetching the remaining pages.
+        The first page tells how many pages there are, the rest are fetched concurrently.
+        Returns the processed pages in order, or None if any page fails.
+        """
+        headers = self._get_headers()
+        params = params | {"per_page": self.page_size}
 
+        async def process_response(
+            response: aiohttp.ClientResponse, content: Optional[tuple[Any, dict[str, str]]]
+        ) -> Optional[T]:
+            if content is None:
                 await self._log_failed_request(
-                    "Failed to get pull requests",
+                    failure_reason,
                     request_url=url,
                     request_headers=headers,
                     request_params=params,
                     response=response,
                 )
+                return None
+            return await process_page(content[0])
+
+        async def get_page(page: int) -> Optional[T]:
+            response, content = await self._conditional_get(
+                url, headers=headers, params=params | {"page": page}
+            )
+            return await process_response(response, content)
+
+        first_response, first_content = await self._conditional_get(
+            url, headers=headers, params=params | {"page": 1}
+        )
+        last_page = 1
+        if first_content is not None and "last" in first_content[1]:
+            last_page = int(URL(first_content[1]["last"]).query["page"])
+
+        results = await asyncio.gather(
+            process_response(first_response, first_content),
+            *[get_page(page) for page in range(2, last_page + 1)],
+        )
+        pages = [result for result in results if result is not None]
+        if len(pages) != len(results):
+            return None
+        return pages
+
+    def _get_rate_limit_delay(
+        self, response: aiohttp.ClientResponse, attempt: int
+    ) -> Optional[float]:
+        """
+        Returns how many seconds to wait before retrying, or None if the response was not rate limited.
+        """
+        if response.status not in (403, 429):
+            return None
+
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            return float(retry_after)
+
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            reset = response.headers.get("X-RateLimit-Reset")
+            if reset is not None:
+                return max(float(reset) - time.time(), 0)
+            return float(2**attempt)
+
+        # A 403 without rate limit headers is a permissions error
+        if response.status == 429:
+            return float(2**attempt)
+        return None
+
+    async def aclose(self) -> None:
+        try:
+            # Let background requests finish before closing the session, and report their errors,
+            # including those of tasks that finished earlier.
+            # They're logged rather than raised, because whoever awaited the comment IDs
+            # has already seen them, and raising here would mask the caller's own outcome
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+            for error in self._background_errors:
+                self.log.error("Background request failed", exc_info=error)
+            self._background_errors.clear()
+        finally:
+            if self._session is not None:
+                await self._session.close()
+                self._session = None
+
+    def _get_headers(self) -> dict[str, str]:
+        return self._headers
+
+    async def find_existing_pr(self, head_branch: str, base_branch: str) -> Optional[int]:
+        """
+        Returns the PR dict of the first open pull request with the same head and base branches
+        """
+
+        cached = self._pr_cache.get((head_branch, base_branch))
+        if cached is not None and time.monotonic() - cached[0] < self.pr_cache_ttl:
+            return cached[1]
+
+        url = self._pulls_url
+        headers = self._get_headers()
+        params = {"state": "open", "head": f"{self.owner}:{head_branch}", "base": base_branch}
+
+        response, content = await self._conditional_get(url, headers=headers, params=params)
+        if content is not None:
+            prs = content[0]
+            pr_number = None
+            if prs:
+                pr_number = prs[0]["number"]
+                self._remember_pr_state(prs[0])
+            self._pr_cache[(head_branch, base_branch)] = (time.monotonic(), pr_number)
+            return pr_number
+
+        await self._log_failed_request(
+            "Failed to get pull requests",
+            request_url=url,
+            request_headers=headers,
+            request_params=params,
+            response=response,
+        )
         return None
 
     async def create_pr(
         self, title: str, bodies: list[str], draft: bool, head_branch: str, base_branch: str
-    ) -> tuple[Optional[int], list[Union[str, Type[PlatformService.PRBodySentinel]]]]:
-        url = f"https://api.github.com/repos/{self.owner}/{self.repo_name}/pulls"
+    ) -> tuple[
+        Optional[int],
+        list[Union[str, Type[PlatformService.PRBodySentinel], asyncio.Future[str]]],
+    ]:
+        url = self._pulls_url
         headers = self._get_headers()
         data = {
             "head": head_branch,
@@ -399,49 +743,108 @@ class GitHubPlatformService(PlatformService):
         if self._drafts_supported:
             data["draft"] = "true" if draft else "false"
 
-        async with ClientSession() as session:
-            async with session.post(url, json=data, headers=headers) as response:
-                if response.status != 201:
-                    # if draft pull request is not supported
-                    if self._is_draft_error(await response.text()):
-                        del data["draft"]
-                        async with session.post(url, json=data, headers=headers) as second_response:
-                            if second_response.status != 201:
-                                await self._log_failed_request(
-                                    "Failed to create pull request",
-                                    request_url=url,
-                                    request_headers=headers,
-                                    request_body=data,
-                                    response=second_response,
-                                )
-                                raise RuntimeError("Failed to create pull request")
-                            response_json = await second_response.json()
-                    else:
-                        await self._log_failed_request(
-                            "Failed to create pull request",
-                            request_url=url,
-                            request_headers=headers,
-                            request_body=data,
-                            response=response,
-                        )
-                        raise RuntimeError("Failed to create pull request")
-                else:
-                    response_json = await response.json()
-
-                self.log.debug("Pull request created successfully", headers=response.headers)
-                pr_number = response_json["number"]
+        response = await self._request("POST", url, json=data, headers=headers)
+        if response.status != 201:
+            # If draft pull requests are not supported, retry without draft
+            if "draft" in data and self._is_draft_error(await response.text()):
+                del data["draft"]
+                response = await self._request("POST", url, json=data, headers=headers)
+
+        if response.status != 201:
+            await self._log_failed_request(
+                "Failed to create pull request",
+                request_url=url,
+                request_headers=headers,
+                request_body=data,
+                response=response,
+            )
+            raise RuntimeError("Failed to create pull request")
+        response_json = orjson.loads(await response.read())
+
+        self.log.debug("Pull request created successfully", headers=response.headers)
+        pr_number = response_json["number"]
+        self._remember_pr_state(response_json)
+        self._pr_cache[(head_branch, base_branch)] = (time.monotonic(), pr_number)
+
+        comment_ids: list[Union[str, Type[PlatformService.PRBodySentinel], asyncio.Future[str]]] = [
+            self.PRBodySentinel
+        ]
+
+        # Add additional bodies as comments in the background,
+        # their IDs aren't needed until the next update
+        if len(bodies) > 1:
+            loop = asyncio.get_running_loop()
+            comment_id_futures: list[asyncio.Future[str]] = [
+                loop.create_future() for _ in bodies[1:]
+            ]
+            self._start_background_task(
+                self._publish_comments(bodies[1:], pr_number, comment_id_futures)
+            )
+            comment_ids.extend(comment_id_futures)
 
-        comment_ids: list[Union[str, Type[PlatformService.PRBodySentinel]]] = [self.PRBodySentinel]
+        return pr_number, comment_ids
 
-        # Add additional bodies as comments
-        for body in bodies[1:]:
-            id_ = await self.publish_comment(body, pr_number)
-            if id_ is None:
+    async def _publish_comments(
+        self, bodies: list[str], issue_number: int, comment_id_futures: list[asyncio.Future[str]]
+    ):
+        """
+        Publish comments concurrently, in the order GitHub will display them,
+        resolving each future with the ID of its comment.
+        """
+        try:
+            results = await asyncio.gather(
+                *[self.publish_comment(body, issue_number) for body in bodies]
+            )
+            comment_ids = [id_ for id_ in results if id_ is not None]
+            if len(comment_ids) != len(results):
                 raise RuntimeError("Failed to publish progress comment")
-                # self.log.error("Failed to publish progress comment")
-            comment_ids.append(id_)
 
-        return pr_number, comment_ids
+            # GitHub shows comments in creation order, which concurrent posting doesn't guarantee,
+            # so if they were created out of order, rewrite their bodies to match
+            if len(comment_ids) > 1:
+                ordered_ids = sorted(comment_ids, key=int)
+                await asyncio.gather(
+                    *[
+                        self.update_comment(str(ordered_id), body)
+                        for ordered_id, id_, body in zip(ordered_ids, comment_ids, bodies)
+                        if ordered_id != id_
+                    ]
+                )
+                comment_ids = ordered_ids
+        except BaseException as e:
+            # Don't leave anyone waiting on an ID, even if the task was cancelled
+            for future in comment_id_futures:
+                if isinstance(e, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+            raise
+
+        for future, comment_id in zip(comment_id_futures, comment_ids):
+            future.set_result(comment_id)
+
+    def _start_background_task(self, coro: Coroutine[Any, Any, Any]):
+        task = asyncio.create_task(coro)
+        # Keep a reference until the task is done, so it isn't garbage collected
+        self._background_tasks.add(task)
+        task.add_done_callback(self._finish_background_task)
+
+    def _finish_background_task(self, task: asyncio.Task[Any]):
+        self._background_tasks.discard(task)
+        # Keep the error for `aclose`, which may only be called after the task is gone
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self._background_errors.append(error)
+
+    def _remember_pr_state(self, pr_json: dict[str, Any]):
+        # Saves a lookup (and no-op mutations) in `set_pr_draft_status`
+        pr_number = pr_json["number"]
+        if "node_id" in pr_json:
+            self._pr_node_ids[pr_number] = pr_json["node_id"]
+        if "draft" in pr_json:
+            self._pr_draft_statuses[pr_number] = pr_json["draft"]
 
     async def merge_pr(
         self,
@@ -450,7 +853,7 @@ class GitHubPlatformService(PlatformService):
         commit_message: str = "Merged automatically by AutoPR",
         merge_method: str = "squash",
     ) -> bool:
-        url = f"https://api.github.com/repos/{self.owner}/{self.repo_name}/pulls/{pr_number}/merge"
+        url = f"{self._pulls_url}/{pr_number}/merge"
         headers = self._get_headers()
         data = {
             "commit_message": commit_message,
@@ -459,49 +862,82 @@ class GitHubPlatformService(PlatformService):
         if commit_title is not None:
             data["commit_title"] = commit_title
 
-        async with ClientSession() as session:
-            async with session.put(url, json=data, headers=headers) as response:
-                if response.status != 200:
-                    await self._log_failed_request(
-                        "Failed to merge pull request",
-                        request_url=url,
-                        request_headers=headers,
-                        request_body=data,
-                        response=response,
-                    )
-                    return False
+        self._invalidate_pr_cache(pr_number)
+        response = await self._request("PUT", url, json=data, headers=headers)
+        if response.status != 200:
+            await self._log_failed_request(
+                "Failed to merge pull request",
+                request_url=url,
+                request_headers=headers,
+                request_body=data,
+                response=response,
+            )
+            return False
 
-                self.log.debug("Pull request merged successfully")
-                return True
+        self.log.debug("Pull request merged successfully")
+        return True
 
     async def _patch_pr(self, pr_number: int, data: dict[str, Any]):
-        url = f"https://api.github.com/repos/{self.owner}/{self.repo_name}/pulls/{pr_number}"
+        url = f"{self._pulls_url}/{pr_number}"
         headers = self._get_headers()
 
-        async with ClientSession() as session:
-            async with session.patch(url, json=data, headers=headers) as response:
-                if response.status == 200:
-                    self.log.debug("Pull request updated successfully")
-                    return
+        response = await self._request("PATCH", url, json=data, headers=headers)
+        if response.status == 200:
+            self.log.debug("Pull request updated successfully")
+            return
 
-                await self._log_failed_request(
-                    "Failed to update pull request",
-                    request_url=url,
-                    request_headers=headers,
-                    request_body=data,
-                    response=response,
-                )
+        await self._log_failed_request(
+            "Failed to update pull request",
+            request_url=url,
+            request_headers=headers,
+            request_body=data,
+            response=response,
+        )
 
     async def close_pr(
         self,
         pr_number: int,
     ):
+        self._invalidate_pr_cache(pr_number)
         await self._patch_pr(pr_number, {"state": "closed"})
 
+    def _invalidate_pr_cache(self, pr_number: int):
+        self._pr_cache = {
+            key: value for key, value in self._pr_cache.items() if value[1] != pr_number
+        }
+
+    def _get_cached_model(self, kind: str, number: int, updated_at: str) -> Optional[Issue]:
+        model = self._model_cache.pop((kind, number, updated_at), None)
+        if model is None:
+            return None
+        self._model_cache[(kind, number, updated_at)] = model
+        # Hand out copies, callers are free to modify what they get
+        return model.copy(deep=True)
+
+    def _cache_model(self, kind: str, model: Issue):
+        self._model_cache[(kind, model.number, model.timestamp)] = model.copy(deep=True)
+        while len(self._model_cache) > self.model_cache_size:
+            del self._model_cache[next(iter(self._model_cache))]
+
+    def _invalidate_model_cache(self, issue_number: Optional[int] = None):
+        if issue_number is None:
+            self._model_cache.clear()
+            return
+        self._model_cache = {
+            key: value for key, value in self._model_cache.items() if key[1] != issue_number
+        }
+
     def _is_draft_error(self, response_text: str):
-        response_obj = json.loads(response_text)
+        # Cheap check before parsing, most errors are not about drafts
+        if "draft pull requests are not supported" not in response_text.lower():
+            return False
+        try:
+            response_obj = orjson.loads(response_text)
+        except orjson.JSONDecodeError:
+            return False
         is_draft_error = (
-            "message" in response_obj
+            isinstance(response_obj, dict)
+            and "message" in response_obj
             and "draft pull requests are not supported" in response_obj["message"].lower()
         )
         if is_draft_error:
@@ -510,66 +946,56 @@ class GitHubPlatformService(PlatformService):
         return is_draft_error
 
     async def _get_pull_request_node_id(self, pr_number: int) -> str:
-        url = f"https://api.github.com/repos/{self.owner}/{self.repo_name}/pulls/{str(pr_number)}"
+        url = f"{self._pulls_url}/{pr_number}"
         headers = self._get_headers()
 
-        async with ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    return (await response.json())["node_id"]
+        response = await self._request("GET", url, headers=headers)
+        if response.status == 200:
+            return orjson.loads(await response.read())["node_id"]
 
-                await self._log_failed_request(
-                    "Failed to get pull request node id",
-                    request_url=url,
-                    request_headers=headers,
-                    response=response,
-                )
+        await self._log_failed_request(
+            "Failed to get pull request node id",
+            request_url=url,
+            request_headers=headers,
+            response=response,
+        )
 
         raise RuntimeError("Failed to get pull request node id")
 
     async def set_pr_draft_status(self, pr_number: int, is_draft: bool):
         if not self._drafts_supported:
             return
-        if self._pr_node_id is None:
-            self._pr_node_id = await self._get_pull_request_node_id(pr_number)
+        if self._pr_draft_statuses.get(pr_number) == is_draft:
+            return
+        if pr_number not in self._pr_node_ids:
+            self._pr_node_ids[pr_number] = await self._get_pull_request_node_id(pr_number)
 
-        # sadly this is only supported by graphQL
+        # sadly this is only supported by graphQL, the REST API ignores `draft` on update
         if is_draft:
-            graphql_query = """
-                mutation ConvertPullRequestToDraft($pullRequestId: ID!) {
-                  convertPullRequestToDraft(input: { pullRequestId: $pullRequestId }) {
-                    clientMutationId
-                  }
-                }
-            """
+            graphql_query = CONVERT_PR_TO_DRAFT_QUERY
         else:
-            graphql_query = """
-                mutation MarkPullRequestReadyForReview($pullRequestId: ID!) {
-                  markPullRequestReadyForReview(input: { pullRequestId: $pullRequestId }) {
-                    clientMutationId
-                  }
-                }
-            """
-        headers = self._get_headers() | {"Content-Type": "application/json"}
+            graphql_query = MARK_PR_READY_FOR_REVIEW_QUERY
+        headers = self._graphql_headers
 
         # Update the pull request
-        data = {"pullRequestId": self._pr_node_id}
+        data = {"pullRequestId": self._pr_node_ids[pr_number]}
         url = "https://api.github.com/graphql"
         body = {"query": graphql_query, "variables": data}
 
-        async with ClientSession() as session:
-            async with session.post(url, headers=headers, json=body) as response:
-                if response.status == 200:
-                    self.log.debug("Pull request draft status updated successfully")
-                    return
+        response = await self._request("POST", url, headers=headers, json=body)
+        # GraphQL reports failed mutations with a 200 and a list of errors
+        if response.status == 200 and not orjson.loads(await response.read()).get("errors"):
+            self.log.debug("Pull request draft status updated successfully")
+            self._pr_draft_statuses[pr_number] = is_draft
+            return
 
-                await self._log_failed_request(
-                    "Failed to update pull request draft status",
-                    request_url=url,
-                    request_headers=headers,
-                    request_body=body,
-                    response=response,
-                )
+        await self._log_failed_request(
+            "Failed to update pull request draft status",
+            request_url=url,
+            request_headers=headers,
+            request_body=body,
+            response=response,
+        )
 
         self._drafts_supported = False
 
@@ -580,46 +1006,54 @@ class GitHubPlatformService(PlatformService):
         await self._patch_pr(pr_number, {"title": title})
 
     async def update_comment(self, comment_id: str, body: str):
-        url = f"https://api.github.com/repos/{self.owner}/{self.repo_name}/issues/comments/{comment_id}"
+        url = f"{self._issues_url}/comments/{comment_id}"
         headers = self._get_headers()
+        # Comments published elsewhere could be on any issue
+        self._invalidate_model_cache(self._comment_issue_numbers.get(str(comment_id)))
 
-        async with ClientSession() as session:
-            async with session.patch(url, json={"body": body}, headers=headers) as response:
-                if response.status == 200:
-                    self.log.debug("Comment updated successfully")
-                    return
+        response = await self._request("PATCH", url, json={"body": body}, headers=headers)
+        if response.status == 200:
+            self.log.debug("Comment updated successfully")
+            return
 
-                await self._log_failed_request(
-                    "Failed to update comment",
-                    request_url=url,
-                    request_headers=headers,
-                    request_body={"body": body},
-                    response=response,
-                )
+        await self._log_failed_request(
+            "Failed to update comment",
+            request_url=url,
+            request_headers=headers,
+            request_body={"body": body},
+            response=response,
+        )
 
     async def publish_comment(self, text: str, issue_number: int) -> Optional[str]:
-        url = f"https://api.github.com/repos/{self.owner}/{self.repo_name}/issues/{issue_number}/comments"
+        url = f"{self._issues_url}/{issue_number}/comments"
         headers = self._get_headers()
         data = {
             "body": text,
         }
 
-        async with ClientSession() as session:
-            async with session.post(url, json=data, headers=headers) as response:
-                if response.status == 201:
-                    self.log.debug("Commented on issue successfully")
-                    return (await response.json())["id"]
-
-                await self._log_failed_request(
-                    "Failed to comment on issue",
-                    request_url=url,
-                    request_headers=headers,
-                    request_body=data,
-                    response=response,
-                )
+        self._invalidate_model_cache(issue_number)
+        response = await self._request("POST", url, json=data, headers=headers)
+        if response.status == 201:
+            self.log.debug("Commented on issue successfully")
+            comment_id = orjson.loads(await response.read())["id"]
+            self._comment_issue_numbers[str(comment_id)] = issue_number
+            return comment_id
+
+        await self._log_failed_request(
+            "Failed to comment on issue",
+            request_url=url,
+            request_headers=headers,
+            request_body=data,
+            response=response,
+        )
         return None
 
-    def _extract_issue(self, issue_json: dict[str, Any]) -> Optional[Issue]:
+    def _extract_issue_sync(self, issue_json: dict[str, Any]) -> Optional[Issue]:
+        # Blocks on the comments request, so only use this outside the event loop (`parse_event`);
+        # coroutines must use `_extract_issue_async` instead
+        cached = self._get_cached_model("issue", issue_json["number"], issue_json["updated_at"])
+        if cached is not None:
+            return cached
         url = issue_json["comments_url"]
         assert url.startswith("https://api.github.com/repos/"), "Unexpected comments_url"
         self.log.info("Getting issue comments", url=url)
@@ -631,7 +1065,31 @@ class GitHubPlatformService(PlatformService):
             "Got issue comments",
             # comments=comments_json,
         )
+        return self._build_issue(issue_json, comments_json)
+
+    async def _extract_issue_async(self, issue_json: dict[str, Any]) -> Optional[Issue]:
+        cached = self._get_cached_model("issue", issue_json["number"], issue_json["updated_at"])
+        if cached is not None:
+            return cached
+        url = issue_json["comments_url"]
+        assert url.startswith("https://api.github.com/repos/"), "Unexpected comments_url"
+        self.log.info("Getting issue comments", url=url)
+        await self._get_session()
+        assert self._comments_semaphore is not None
+        async with self._comments_semaphore:
+            response, content = await self._conditional_get(url, headers=self._get_headers())
+        response.raise_for_status()
+        assert content is not None, "Unexpected response status"
+        comments_json = content[0]
+        self.log.info(
+            "Got issue comments",
+            # comments=comments_json,
+        )
+        return self._build_issue(issue_json, comments_json)
 
+    def _build_issue(
+        self, issue_json: dict[str, Any], comments_json: list[dict[str, Any]]
+    ) -> Optional[Issue]:
         # Get body
         comments_list = []
         body_message = Message(
@@ -649,7 +1107,7 @@ class GitHubPlatformService(PlatformService):
             comments_list.append(comment)
 
         # Create issue
-        return Issue(
+        issue = Issue(
             open=issue_json["state"] == "open",
             number=issue_json["number"],
             title=issue_json["title"],
@@ -657,12 +1115,19 @@ class GitHubPlatformService(PlatformService):
             timestamp=issue_json["updated_at"],
             messages=comments_list,
         )
-
-    def _extract_pull_request(self, pr_json: dict[str, Any]) -> Optional[PullRequest]:
-        issue = self._extract_issue(pr_json)
+        self._cache_model("issue", issue)
+        return issue
+
+    def _extract_pull_request_sync(self, pr_json: dict[str, Any]) -> Optional[PullRequest]:
+        # Like `_extract_issue_sync`, blocks and must not be called from a coroutine
+        cached = self._get_cached_model("pull_request", pr_json["number"], pr_json["updated_at"])
+        # The base branch can move without touching `updated_at`
+        if isinstance(cached, PullRequest) and cached.base_commit_sha == pr_json["base"]["sha"]:
+            return cached
+        issue = self._extract_issue_sync(pr_json)
         if issue is None:
             return issue
-        return PullRequest(
+        pull_request = PullRequest(
             open=issue.open,
             number=issue.number,
             title=issue.title,
@@ -673,70 +1138,195 @@ class GitHubPlatformService(PlatformService):
             base_branch=pr_json["base"]["ref"],
             base_commit_sha=pr_json["base"]["sha"],
         )
+        self._cache_model("pull_request", pull_request)
+        return pull_request
 
     async def get_issues(
         self, state: Optional[str] = None, since: Optional[datetime] = None
     ) -> list[Issue]:
-        url = f"https://api.github.com/repos/{self.owner}/{self.repo_name}/issues"
-        if state:
-            url += f"?state={state}"
-
-        # Check if 'since' is provided and add it to the URL
-        if since:
-            url += f"&since={since.strftime('%Y-%m-%dT%H:%M:%SZ')}"
+        issues = [issue async for issue in self.get_issues_iter(state=state, since=since)]
+        # Restore GitHub's default order (newest first)
+        return sorted(issues, key=lambda issue: issue.number, reverse=True)
 
-        headers = self._get_headers()
+    async def get_issues_iter(
+        self, state: Optional[str] = None, since: Optional[datetime] = None
+    ) -> AsyncIterator[Issue]:
+        # Issues are fetched with their comments in one GraphQL query per page,
+        # instead of a REST request per issue for its comments
+        url = "https://api.github.com/graphql"
+        variables: dict[str, Any] = {
+            "owner": self.owner,
+            "name": self.repo_name,
+            "pageSize": self.page_size,
+            "states": self._get_issue_states(state),
+            "since": since.strftime("%Y-%m-%dT%H:%M:%SZ") if since else None,
+            "cursor": None,
+        }
 
-        async with ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status != 200:
+        # Issues with more comments than fit in the query get the rest over REST, concurrently
+        overflow_tasks: list[asyncio.Task[Issue]] = []
+        try:
+            while True:
+                body = {"query": GET_ISSUES_QUERY, "variables": variables}
+                response = await self._request(
+                    "POST", url, headers=self._graphql_headers, json=body
+                )
+                response_json = None
+                if response.status == 200:
+                    response_json = orjson.loads(await response.read())
+                if response_json is None or response_json.get("errors"):
                     await self._log_failed_request(
                         "Failed to get issues",
                         request_url=url,
-                        request_headers=headers,
+                        request_headers=self._graphql_headers,
+                        request_body=body,
                         response=response,
                     )
-                    return []
+                    break
 
-                return [
-                    issue
-                    for issue_json in await response.json()
-                    if (issue := self._extract_issue(issue_json)) is not None
-                    and not issue_json.get("pull_request")
-                ]
+                issues = response_json["data"]["repository"]["issues"]
+                for issue_node in issues["nodes"]:
+                    if issue_node["comments"]["pageInfo"]["hasNextPage"]:
+                        cached = self._get_cached_model(
+                            "issue_full", issue_node["number"], issue_node["updatedAt"]
+                        )
+                        if cached is not None:
+                            yield cached
+                            continue
+                        overflow_tasks.append(
+                            asyncio.create_task(self._extract_issue_node_async(issue_node))
+                        )
+                    else:
+                        yield self._build_issue_from_node(issue_node)
 
-    def parse_event(self, event: dict[str, Any], event_name: str) -> EventUnion:
-        if event_name == "push":
-            return PushEvent(
-                branch=event["ref"].split("/")[-1],
-            )
-        if event_name == "schedule":
-            return CronEvent(
-                cron_schedule=event["schedule"],
-            )
-        if event["action"] == "labeled":
-            return LabelEvent(
-                pull_request=self._extract_pull_request(event["pull_request"])
-                if "pull_request" in event
-                else None,
-                issue=self._extract_issue(event["issue"]) if "issue" in event else None,
-                label=event["label"]["name"],
+                if not issues["pageInfo"]["hasNextPage"]:
+                    break
+                variables["cursor"] = issues["pageInfo"]["endCursor"]
+
+            for overflow_task in asyncio.as_completed(overflow_tasks):
+                yield await overflow_task
+        finally:
+            for overflow_task in overflow_tasks:
+                overflow_task.cancel()
+
+    async def _extract_issue_node_async(self, issue_node: dict[str, Any]) -> Issue:
+        url = f"{self._issues_url}/{issue_node['number']}/comments"
+        self.log.info("Getting issue comments", url=url)
+
+        async def get_messages(comments_json: list[Any]) -> list[Message]:
+            return [
+                Message(body=comment_json["body"] or "", author=comment_json["user"]["login"])
+                for comment_json in comments_json
+            ]
+
+        await self._get_session()
+        assert self._comments_semaphore is not None
+        async with self._comments_semaphore:
+            pages = await self._get_all_pages(url, {}, "Failed to get issue comments", get_messages)
+        if pages is None:
+            # Better an issue with only some of its comments than leaving it out
+            self.log.warning(
+                "Using only the first comments of issue", issue_number=issue_node["number"]
             )
-        if event["action"] == "comment":
-            return CommentEvent(
-                pull_request=self._extract_pull_request(event["issue"]["pull_request"]),
-                issue=self._extract_issue(event["issue"]),
-                comment=Message(
-                    body=event["comment"]["body"],
-                    author=event["comment"]["user"]["login"],
-                ),
+            return self._build_issue_from_node(issue_node)
+        issue = self._build_issue_from_node(
+            issue_node, comments=[message for page in pages for message in page]
+        )
+        # Unlike the "issue" kind, which only has the first page of comments, this has them all
+        self._cache_model("issue_full", issue)
+        return issue
+
+    @staticmethod
+    def _get_issue_states(state: Optional[str]) -> list[str]:
+        state = state or "open"
+        if state not in ISSUE_STATES:
+            raise ValueError(
+                f"Unknown issue state `{state}`, expected one of {', '.join(ISSUE_STATES)}"
             )
-        raise NotImplementedError(f"Unknown event action: {event['action']}")
+        return ISSUE_STATES[state]
+
+    @staticmethod
+    def _get_author_login(author_node: Optional[dict[str, Any]]) -> str:
+        # Deleted users show up as a null author
+        if author_node is None:
+            return "ghost"
+        # GraphQL leaves out the suffix that REST gives bot logins
+        if author_node["__typename"] == "Bot":
+            return f"{author_node['login']}[bot]"
+        return author_node["login"]
+
+    def _build_issue_from_node(
+        self, issue_node: dict[str, Any], comments: Optional[list[Message]] = None
+    ) -> Issue:
+        author = self._get_author_login(issue_node["author"])
+        if comments is None:
+            comments = [
+                Message(
+                    body=comment_node["body"] or "",
+                    author=self._get_author_login(comment_node["author"]),
+                )
+                for comment_node in issue_node["comments"]["nodes"]
+            ]
+        return Issue(
+            open=issue_node["state"] == "OPEN",
+            number=issue_node["number"],
+            title=issue_node["title"],
+            author=author,
+            timestamp=issue_node["updatedAt"],
+            messages=[Message(body=issue_node["body"] or "", author=author)] + comments,
+        )
+
+    def _parse_push_event(self, event: dict[str, Any]) -> PushEvent:
+        return PushEvent(
+            branch=event["ref"].split("/")[-1],
+        )
+
+    def _parse_schedule_event(self, event: dict[str, Any]) -> CronEvent:
+        return CronEvent(
+            cron_schedule=event["schedule"],
+        )
+
+    def _parse_label_event(self, event: dict[str, Any]) -> LabelEvent:
+        return LabelEvent(
+            pull_request=self._extract_pull_request_sync(event["pull_request"])
+            if "pull_request" in event
+            else None,
+            issue=self._extract_issue_sync(event["issue"]) if "issue" in event else None,
+            label=event["label"]["name"],
+        )
+
+    def _parse_comment_event(self, event: dict[str, Any]) -> CommentEvent:
+        return CommentEvent(
+            pull_request=self._extract_pull_request_sync(event["issue"]["pull_request"]),
+            issue=self._extract_issue_sync(event["issue"]),
+            comment=Message(
+                body=event["comment"]["body"],
+                author=event["comment"]["user"]["login"],
+            ),
+        )
+
+    # Events are parsed by event name first, then by action
+    _event_name_parsers: dict[str, Callable[[Any, dict[str, Any]], EventUnion]] = {
+        "push": _parse_push_event,
+        "schedule": _parse_schedule_event,
+    }
+    _event_action_parsers: dict[str, Callable[[Any, dict[str, Any]], EventUnion]] = {
+        "labeled": _parse_label_event,
+        "comment": _parse_comment_event,
+    }
+
+    def parse_event(self, event: dict[str, Any], event_name: str) -> EventUnion:
+        parser = self._event_name_parsers.get(event_name)
+        if parser is None:
+            parser = self._event_action_parsers.get(event["action"])
+        if parser is None:
+            raise NotImplementedError(f"Unknown event action: {event['action']}")
+        return parser(self, event)
 
     async def create_issue(
         self, title: str, body: str, labels: Optional[list[str]] = None
     ) -> Optional[int]:
-        url = f"https://api.github.com/repos/{self.owner}/{self.repo_name}/issues"
+        url = self._issues_url
         headers = self._get_headers()
         data = {
             "title": title,
@@ -745,70 +1335,67 @@ class GitHubPlatformService(PlatformService):
         if labels is not None:
             data["labels"] = labels  # type: ignore[reportGeneralTypeIssues]
 
-        async with ClientSession() as session:
-            async with session.post(url, json=data, headers=headers) as response:
-                self.log.debug(
-                    "Creating issue with title: %s, body %s and labels %s",
-                    title,
-                    body,
-                    ", ".join(labels or []),
-                )
-                if response.status == 201:
-                    self.log.debug("Issue created successfully")
-                    return (await response.json())["number"]
-
-                await self._log_failed_request(
-                    "Failed to create issue",
-                    request_url=url,
-                    request_headers=headers,
-                    request_body=data,
-                    response=response,
-                )
+        response = await self._request("POST", url, json=data, headers=headers)
+        self.log.debug(
+            "Creating issue with title: %s, body %s and labels %s",
+            title,
+            body,
+            ", ".join(labels or []),
+        )
+        if response.status == 201:
+            self.log.debug("Issue created successfully")
+            return orjson.loads(await response.read())["number"]
+
+        await self._log_failed_request(
+            "Failed to create issue",
+            request_url=url,
+            request_headers=headers,
+            request_body=data,
+            response=response,
+        )
         return None
 
     async def get_issue_by_title(self, title: str) -> Optional[Issue]:
-        url = f"https://api.github.com/repos/{self.owner}/{self.repo_name}/issues"
+        url = self._issues_url
         headers = self._get_headers()
 
-        async with ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status != 200:
-                    await self._log_failed_request(
-                        "Failed to get issues",
-                        request_url=url,
-                        request_headers=headers,
-                        response=response,
-                    )
-                    return None
+        response = await self._request("GET", url, headers=headers)
+        if response.status != 200:
+            await self._log_failed_request(
+                "Failed to get issues",
+                request_url=url,
+                request_headers=headers,
+                response=response,
+            )
+            return None
 
-                for issue_json in await response.json():
-                    if issue_json["title"] == title:
-                        return self._extract_issue(issue_json)
-                return None
+        for issue_json in orjson.loads(await response.read()):
+            if issue_json["title"] == title:
+                return await self._extract_issue_async(issue_json)
+        return None
 
     async def update_issue_body(
         self, issue_number: int, body: str, labels: Optional[list[str]] = None
     ) -> None:
-        url = f"https://api.github.com/repos/{self.owner}/{self.repo_name}/issues/{issue_number}"
+        url = f"{self._issues_url}/{issue_number}"
         headers = self._get_headers()
 
         data = {"body": body}
         if labels is not None:
             data["labels"] = labels  # type: ignore[reportGeneralTypeIssues]
 
-        async with ClientSession() as session:
-            async with session.patch(url, json=data, headers=headers) as response:
-                if response.status == 200:
-                    self.log.debug("Issue updated successfully")
-                    return
+        response = await self._request("PATCH", url, json=data, headers=headers)
+        if response.status == 200:
+            self.log.debug("Issue updated successfully")
+            return
 
-                await self._log_failed_request(
-                    "Failed to update issue",
-                    request_url=url,
-                    request_headers=headers,
-                    request_body=data,
-                    response=response,
-                )
+        await self._log_failed_request(
+            "Failed to update issue",
+            request_url=url,
+            request_headers=headers,
+            request_body=data,
+            response=response,
+        )
 
     async def get_file_url(
         self,
@@ -866,24 +1453,23 @@ class GitHubPlatformService(PlatformService):
         return num_lines
 
     async def close_issue(self, issue_number: int) -> None:
-        url = f"https://api.github.com/repos/{self.owner}/{self.repo_name}/issues/{issue_number}"
+        url = f"{self._issues_url}/{issue_number}"
         headers = self._get_headers()
 
         data = {"state": "closed"}
 
-        async with ClientSession() as session:
-            async with session.patch(url, json=data, headers=headers) as response:
-                if response.status == 200:
-                    self.log.debug("Issue closed successfully")
-                    return
+        response = await self._request("PATCH", url, json=data, headers=headers)
+        if response.status == 200:
+            self.log.debug("Issue closed successfully")
+            return
 
-                await self._log_failed_request(
-                    "Failed to close issue",
-                    request_url=url,
-                    request_headers=headers,
-                    request_body=data,
-                    response=response,
-                )
+        await self._log_failed_request(
+            "Failed to close issue",
+            request_url=url,
+            request_headers=headers,
+            request_body=data,
+            response=response,
+        )
 
 
 class DummyPlatformService(PlatformService):
@@ -912,7 +1498,10 @@ class DummyPlatformService(PlatformService):
 
     async def create_pr(
         self, title: str, bodies: list[str], draft: bool, head_branch: str, base_branch: str
-    ) -> tuple[Optional[int], list[Union[str, Type[PlatformService.PRBodySentinel]]]]:
+    ) -> tuple[
+        Optional[int],
+        list[Union[str, Type[PlatformService.PRBodySentinel], asyncio.Future[str]]],
+    ]:
         return 1, [PlatformService.PRBodySentinel]
 
     async def merge_pr(
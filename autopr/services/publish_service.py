@@ -95,7 +95,9 @@ class PublishService:
         self.root_publish_service: Optional[PublishService] = None
 
         # list of comment IDs, incl. PRBodySentinel to denote the body of the PR
-        self._comment_ids: list[Union[str, Type[PlatformService.PRBodySentinel]]] = []
+        self._comment_ids: list[
+            Union[str, Type[PlatformService.PRBodySentinel], asyncio.Future[str]]
+        ] = []
 
         if title is None:
             if issue is not None:
@@ -315,6 +317,7 @@ class PublishService:
         if self.pr_number is None:
             self.log.warning("PR merge requested, but does not exist")
             return
+        await self._wait_for_comments()
         if reason is not None:
             await self.publish_comment(reason)
         success = await self.platform_service.merge_pr(
@@ -342,6 +345,7 @@ class PublishService:
         if self.pr_number is None:
             self.log.warning("PR close requested, but does not exist")
             return
+        await self._wait_for_comments()
         if reason is not None:
             await self.publish_comment(reason)
         return await self.platform_service.close_pr(self.pr_number)
@@ -626,8 +630,19 @@ class PublishService:
                 if self.pr_number is None:
                     raise RuntimeError("Error creating pull request")
             issue_number = self.pr_number
+        if issue_number == self.pr_number:
+            await self._wait_for_comments()
         return await self.platform_service.publish_comment(text, issue_number)
 
+    async def _wait_for_comments(self):
+        """
+        Wait for the comments still being published from `create_pr`,
+        so that anything posted on the PR afterwards shows up after them.
+        """
+        for i, comment_id in enumerate(self._comment_ids):
+            if isinstance(comment_id, asyncio.Future):
+                self._comment_ids[i] = await comment_id
+
     async def _publish_progress(
         self,
         bodies: list[str],
@@ -676,6 +691,9 @@ class PublishService:
                 self._comment_ids.append(comment_id)
                 continue
             comment_id = self._comment_ids[i]
+            if isinstance(comment_id, asyncio.Future):
+                # Comment was still being published when the PR was created
+                comment_id = self._comment_ids[i] = await comment_id
             if comment_id is PlatformService.PRBodySentinel:
                 await self.platform_service.update_pr_body(self.pr_number, body)
             else:
@@ -1,11 +1,16 @@
+import asyncio
 import json
 import os
+from typing import Any, Optional
 from unittest.mock import MagicMock, patch, Mock
 
 import pytest
-from aioresponses import aioresponses
+import pytest_asyncio
+from aioresponses import CallbackResult, aioresponses
 from git import Commit
+from structlog.testing import capture_logs
 from git.repo import Repo
+from yarl import URL
 
 from autopr.models.artifacts import Issue, PullRequest, Message
 from autopr.models.events import EventUnion, LabelEvent
@@ -14,13 +19,15 @@ from autopr.services.publish_service import GitHubPublishService
 from datetime import datetime
 
 
-@pytest.fixture
-def platform_service():
-    return GitHubPlatformService(
+@pytest_asyncio.fixture
+async def platform_service():
+    service = GitHubPlatformService(
         token="my_token",
         owner="user",
         repo_name="repo",
     )
+    yield service
+    await service.aclose()
 
 
 @pytest.fixture
@@ -29,10 +36,51 @@ def mock_aioresponse():
         yield m
 
 
-@patch("requests.get")
+def issue_node(
+    number: int, comments: list[tuple[str, str]], more_comments: bool = False
+) -> dict[str, Any]:
+    """
+    An issue as returned by the GraphQL issues query, by a deleted user,
+    with comments given as (body, author type) pairs.
+    """
+    return {
+        "number": number,
+        "title": f"Issue {number}",
+        "state": "OPEN",
+        "body": None,
+        "updatedAt": "2023-08-20T10:25:48Z",
+        "author": None,
+        "comments": {
+            "pageInfo": {"hasNextPage": more_comments},
+            "nodes": [
+                {"body": body, "author": {"__typename": typename, "login": "user1"}}
+                for body, typename in comments
+            ],
+        },
+    }
+
+
+def issues_page(nodes: list[dict[str, Any]], end_cursor: Optional[str]) -> dict[str, Any]:
+    """
+    A page of the GraphQL issues query, followed by another page if `end_cursor` is given.
+    """
+    return {
+        "data": {
+            "repository": {
+                "issues": {
+                    "pageInfo": {
+                        "hasNextPage": end_cursor is not None,
+                        "endCursor": end_cursor,
+                    },
+                    "nodes": nodes,
+                }
+            }
+        }
+    }
+
+
 @pytest.mark.asyncio
 async def test_github_platform_service(
-    mock_get,
     mock_aioresponse,
     platform_service,
 ):
@@ -52,29 +100,32 @@ async def test_github_platform_service(
     )
 
     timestamp = "2023-08-20T10:25:48Z"
-    comments_url = f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}/issues/1/comments"
 
-    mock_aioresponse.get(
-        f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}/issues?state=open&since={timestamp}",
-        payload=[
-            {
-                "state": "open",
-                "number": 1,
-                "node_id": "node1",
-                "title": "Ups an issue occurred.",
-                "body": "I am an issue. Resolve me.",
-                "user": {"login": "user1"},
-                "created_at": "2023-08-19T17:38:34Z",
-                "updated_at": "2023-08-20T10:25:48Z",
-                "comments": 0,
-                "comments_url": comments_url,
+    mock_aioresponse.post(
+        "https://api.github.com/graphql",
+        payload={
+            "data": {
+                "repository": {
+                    "issues": {
+                        "pageInfo": {"hasNextPage": False, "endCursor": "cursor1"},
+                        "nodes": [
+                            {
+                                "number": 1,
+                                "title": "Ups an issue occurred.",
+                                "state": "OPEN",
+                                "body": "I am an issue. Resolve me.",
+                                "updatedAt": "2023-08-20T10:25:48Z",
+                                "author": {"__typename": "User", "login": "user1"},
+                                "comments": {"pageInfo": {"hasNextPage": False}, "nodes": []},
+                            }
+                        ],
+                    }
+                }
             }
-        ],
+        },
         status=200,
     )
 
-    mock_get.return_value = Mock(status_code=200, json=lambda: [])
-
     mock_aioresponse.post(
         f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}/pulls",
         payload={"number": 2},
@@ -117,7 +168,8 @@ async def test_github_platform_service(
         "title", ["body1", "body2"], True, head_branch, base_branch
     )
     assert pr_number == 2
-    assert comment_ids == [platform_service.PRBodySentinel, "comment1"]
+    assert comment_ids[0] is platform_service.PRBodySentinel
+    assert await comment_ids[1] == "comment1"
 
     # Test _update_pr_body
     await platform_service.update_pr_body(1, "new body")
@@ -132,6 +184,8 @@ async def test_github_platform_service(
     # Test _get_issues
     since = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ")
     issues = await platform_service.get_issues(state="open", since=since)
+    graphql_calls = mock_aioresponse.requests[("POST", URL("https://api.github.com/graphql"))]
+    assert graphql_calls[0].kwargs["json"]["variables"]["since"] == timestamp
     assert issues == [
         Issue(
             open=True,
@@ -239,6 +293,476 @@ def test_parse_event(
     assert event == expected_event
 
 
+@pytest.mark.asyncio
+async def test_session_is_reused(mock_aioresponse, platform_service):
+    url = (
+        f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}/issues"
+    )
+    mock_aioresponse.post(url, payload={"number": 1}, status=201, repeat=True)
+
+    await platform_service.create_issue("title1", "body1")
+    session = platform_service._session
+    await platform_service.create_issue("title2", "body2")
+    assert platform_service._session is session
+
+    await platform_service.aclose()
+    assert session.closed
+    assert platform_service._session is None
+
+
+@pytest.mark.asyncio
+async def test_create_pr_retries_without_draft(mock_aioresponse, platform_service):
+    url = (
+        f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}/pulls"
+    )
+    mock_aioresponse.post(
+        url,
+        payload={"message": "Draft pull requests are not supported in this repository."},
+        status=422,
+    )
+    mock_aioresponse.post(url, payload={"number": 2}, status=201)
+
+    pr_number, _ = await platform_service.create_pr("title", ["body"], True, "branch1", "branch2")
+    assert pr_number == 2
+    assert not platform_service._drafts_supported
+
+    first_request, second_request = mock_aioresponse.requests[("POST", URL(url))]
+    assert first_request.kwargs["json"]["draft"] == "true"
+    assert "draft" not in second_request.kwargs["json"]
+
+
+@pytest.mark.asyncio
+async def test_comment_after_create_pr_is_posted_last(mock_aioresponse, platform_service):
+    base_url = f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}"
+    mock_aioresponse.post(f"{base_url}/pulls", payload={"number": 2}, status=201)
+    posted_bodies = []
+
+    async def post_comment(url, **kwargs):
+        body = kwargs["json"]["body"]
+        if body == "body2":
+            # The continuation of the PR body is slow to be created
+            await asyncio.sleep(0.01)
+        posted_bodies.append(body)
+        return CallbackResult(status=201, payload={"id": len(posted_bodies)})
+
+    mock_aioresponse.post(f"{base_url}/issues/2/comments", callback=post_comment, repeat=True)
+
+    publish_service = GitHubPublishService(
+        platform_service,
+        run_id="1",
+        owner=platform_service.owner,
+        repo_name=platform_service.repo_name,
+        base_branch="main",
+        head_branch="branch1",
+        title="title",
+    )
+    await publish_service._publish_progress(["body1", "body2"])
+    await publish_service.publish_comment("comment")
+
+    assert posted_bodies == ["body2", "comment"]
+
+
+@pytest.mark.asyncio
+async def test_create_pr_comment_failure_is_raised(mock_aioresponse, platform_service):
+    base_url = f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}"
+    mock_aioresponse.post(f"{base_url}/pulls", payload={"number": 2}, status=201)
+    mock_aioresponse.post(f"{base_url}/issues/2/comments", payload={}, status=422)
+
+    pr_number, comment_ids = await platform_service.create_pr(
+        "title", ["body1", "body2"], True, "branch1", "branch2"
+    )
+    assert pr_number == 2
+    with pytest.raises(RuntimeError):
+        await comment_ids[1]
+
+    # The error is still reported by aclose after the task has finished, without being raised again
+    await asyncio.wait(platform_service._background_tasks)
+    assert not platform_service._background_tasks
+    with capture_logs() as logs:
+        await platform_service.aclose()
+    assert [log["event"] for log in logs if log["log_level"] == "error"] == [
+        "Background request failed"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_create_pr_cancelled_comments_resolve(mock_aioresponse, platform_service):
+    base_url = f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}"
+    mock_aioresponse.post(f"{base_url}/pulls", payload={"number": 2}, status=201)
+    comment_started = asyncio.Event()
+
+    async def stall_comment(url, **kwargs):
+        comment_started.set()
+        await asyncio.Event().wait()
+
+    mock_aioresponse.post(f"{base_url}/issues/2/comments", callback=stall_comment)
+
+    _, comment_ids = await platform_service.create_pr(
+        "title", ["body1", "body2"], True, "branch1", "branch2"
+    )
+    await comment_started.wait()
+    for task in platform_service._background_tasks:
+        task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(comment_ids[1], timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_find_existing_pr_is_cached(mock_aioresponse, platform_service):
+    url = f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}/pulls?base=branch2&head=user%253Abranch1&state=open"
+    mock_aioresponse.get(url, payload=[{"number": 1}], status=200, repeat=True)
+    mock_aioresponse.patch(
+        f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}/pulls/1",
+        payload={},
+        status=200,
+    )
+
+    assert await platform_service.find_existing_pr("branch1", "branch2") == 1
+    assert await platform_service.find_existing_pr("branch1", "branch2") == 1
+    assert len(mock_aioresponse.requests) == 1
+
+    # Closing the PR invalidates the cached lookup
+    await platform_service.close_pr(1)
+    assert await platform_service.find_existing_pr("branch1", "branch2") == 1
+    get_calls = [
+        call
+        for (method, _), calls in mock_aioresponse.requests.items()
+        if method == "GET"
+        for call in calls
+    ]
+    assert len(get_calls) == 2
+
+
+@patch("requests.get")
+@pytest.mark.asyncio
+async def test_parsed_models_are_cached(mock_get, mock_aioresponse, platform_service):
+    mock_get.return_value = Mock(status_code=200, json=lambda: [])
+    with open(
+        os.path.join(os.path.dirname(__file__), "resources", "events", "gh_pr_label_event.json")
+    ) as f:
+        event_json = json.load(f)
+
+    event = platform_service.parse_event(event_json, "pull_request_target")
+    event.pull_request.base_commit_sha = "modified"
+    assert platform_service.parse_event(event_json, "pull_request_target") != event
+    assert mock_get.call_count == 1
+
+    # Commenting on the PR invalidates it
+    mock_aioresponse.post(
+        f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}/issues/{event.pull_request.number}/comments",
+        payload={"id": 1},
+        status=201,
+    )
+    await platform_service.publish_comment("comment", event.pull_request.number)
+    platform_service.parse_event(event_json, "pull_request_target")
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_issues_fetches_all_pages(mock_aioresponse, platform_service):
+    base_url = f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}"
+
+    mock_aioresponse.post(
+        "https://api.github.com/graphql",
+        payload=issues_page(
+            [issue_node(3, [("comment", "Bot")]), issue_node(2, [("a", "User")], True)], "c1"
+        ),
+        status=200,
+    )
+    mock_aioresponse.post(
+        "https://api.github.com/graphql",
+        payload=issues_page([issue_node(1, [])], None),
+        status=200,
+    )
+    # Issue 2 has more comments than fit in the query, so they're all fetched over REST
+    mock_aioresponse.get(
+        f"{base_url}/issues/2/comments?per_page=100&page=1",
+        payload=[{"body": "a", "user": {"login": "user1"}}],
+        headers={"Link": f'<{base_url}/issues/2/comments?per_page=100&page=2>; rel="last"'},
+        status=200,
+    )
+    mock_aioresponse.get(
+        f"{base_url}/issues/2/comments?per_page=100&page=2",
+        payload=[{"body": "b", "user": {"login": "user2"}}],
+        status=200,
+    )
+
+    issues = await platform_service.get_issues()
+    assert [issue.number for issue in issues] == [3, 2, 1]
+    # Bot logins match what the REST API returns
+    assert issues[0].messages[1].author == "user1[bot]"
+    assert issues[1].messages == [
+        Message(body="", author="ghost"),
+        Message(body="a", author="user1"),
+        Message(body="b", author="user2"),
+    ]
+
+    graphql_calls = mock_aioresponse.requests[("POST", URL("https://api.github.com/graphql"))]
+    assert [call.kwargs["json"]["variables"]["cursor"] for call in graphql_calls] == [None, "c1"]
+    assert graphql_calls[0].kwargs["json"]["variables"]["states"] == ["OPEN"]
+
+
+@pytest.mark.asyncio
+async def test_get_issues_keeps_issue_if_overflow_fails(mock_aioresponse, platform_service):
+    base_url = f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}"
+    mock_aioresponse.post(
+        "https://api.github.com/graphql",
+        payload=issues_page([issue_node(1, [("a", "User")], True)], None),
+        status=200,
+    )
+    mock_aioresponse.get(f"{base_url}/issues/1/comments?per_page=100&page=1", status=500)
+
+    with capture_logs() as logs:
+        issues = await platform_service.get_issues()
+    # Falls back to the comments returned with the issue
+    assert issues[0].messages == [
+        Message(body="", author="ghost"),
+        Message(body="a", author="user1"),
+    ]
+    assert "Using only the first comments of issue" in [log["event"] for log in logs]
+
+
+@pytest.mark.asyncio
+async def test_get_issues_ignores_models_with_first_comments(mock_aioresponse, platform_service):
+    base_url = f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}"
+    # As cached by `parse_event` or `get_issue_by_title`, with only the first page of comments
+    platform_service._cache_model(
+        "issue",
+        Issue(
+            open=True,
+            number=1,
+            title="Issue 1",
+            author="ghost",
+            timestamp="2023-08-20T10:25:48Z",
+            messages=[Message(body="", author="ghost"), Message(body="a", author="user1")],
+        ),
+    )
+    mock_aioresponse.post(
+        "https://api.github.com/graphql",
+        payload=issues_page([issue_node(1, [("a", "User")], True)], None),
+        status=200,
+        repeat=True,
+    )
+    mock_aioresponse.get(
+        f"{base_url}/issues/1/comments?per_page=100&page=1",
+        payload=[
+            {"body": "a", "user": {"login": "user1"}},
+            {"body": "b", "user": {"login": "user1"}},
+        ],
+        status=200,
+    )
+
+    for _ in range(2):
+        issues = await platform_service.get_issues()
+        assert len(issues[0].messages) == 3
+    # The complete model is cached for the second call
+    get_calls = [
+        call
+        for (method, _), calls in mock_aioresponse.requests.items()
+        if method == "GET"
+        for call in calls
+    ]
+    assert len(get_calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_issues_rejects_unknown_state(platform_service):
+    with pytest.raises(ValueError, match="open, closed, all"):
+        await platform_service.get_issues(state="merged")
+
+
+@pytest.mark.asyncio
+async def test_get_issues_iter_does_not_wait_for_overflow(mock_aioresponse, platform_service):
+    base_url = f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}"
+
+    mock_aioresponse.post(
+        "https://api.github.com/graphql",
+        payload=issues_page([issue_node(2, [], True), issue_node(1, [])], None),
+        status=200,
+    )
+
+    overflow_started = asyncio.Event()
+    overflow_cancelled = asyncio.Event()
+
+    async def stall_overflow(url, **kwargs):
+        overflow_started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            overflow_cancelled.set()
+            raise
+
+    mock_aioresponse.get(
+        f"{base_url}/issues/2/comments?per_page=100&page=1", callback=stall_overflow
+    )
+
+    issues = platform_service.get_issues_iter()
+    # Issue 1 is yielded while the comments of issue 2 are still being fetched
+    assert (await issues.__anext__()).number == 1
+    await asyncio.wait_for(overflow_started.wait(), timeout=1)
+    assert not overflow_cancelled.is_set()
+
+    # Stopping early cancels the pending fetch
+    await issues.aclose()
+    await asyncio.wait_for(overflow_cancelled.wait(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_reuses_unmodified_response(mock_aioresponse, platform_service):
+    url = f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}/issues/1/comments"
+    mock_aioresponse.get(url, payload=[{"id": 1}], headers={"ETag": '"abc"'}, status=200)
+    mock_aioresponse.get(url, status=304)
+
+    _, first_content = await platform_service._conditional_get(url)
+    second_response, second_content = await platform_service._conditional_get(url)
+    assert second_response.status == 304
+    assert second_content == first_content == ([{"id": 1}], {})
+
+    second_request = mock_aioresponse.requests[("GET", URL(url))][1]
+    assert second_request.kwargs["headers"]["If-None-Match"] == '"abc"'
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_cache_is_bounded(mock_aioresponse, platform_service):
+    platform_service.etag_cache_size = 2
+    base_url = f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}"
+    for number in range(1, 4):
+        url = f"{base_url}/issues/{number}/comments"
+        mock_aioresponse.get(url, payload=[], headers={"ETag": f'"{number}"'}, status=200)
+        await platform_service._conditional_get(url)
+
+    assert [key[0] for key in platform_service._etag_cache] == [
+        f"{base_url}/issues/2/comments",
+        f"{base_url}/issues/3/comments",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_create_pr_keeps_comment_order(mock_aioresponse, platform_service):
+    base_url = f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}"
+    mock_aioresponse.post(f"{base_url}/pulls", payload={"number": 2}, status=201)
+    # Simulate the second comment being created before the first
+    mock_aioresponse.post(f"{base_url}/issues/2/comments", payload={"id": 11}, status=201)
+    mock_aioresponse.post(f"{base_url}/issues/2/comments", payload={"id": 10}, status=201)
+    mock_aioresponse.patch(f"{base_url}/issues/comments/10", payload={}, status=200)
+    mock_aioresponse.patch(f"{base_url}/issues/comments/11", payload={}, status=200)
+
+    pr_number, comment_ids = await platform_service.create_pr(
+        "title", ["body1", "body2", "body3"], True, "branch1", "branch2"
+    )
+    assert pr_number == 2
+    assert comment_ids[0] is platform_service.PRBodySentinel
+    assert [await comment_id for comment_id in comment_ids[1:]] == [10, 11]
+    # Let the reordering updates finish
+    await asyncio.gather(*platform_service._background_tasks)
+
+    updated_bodies = {
+        str(url): calls[0].kwargs["json"]["body"]
+        for (method, url), calls in mock_aioresponse.requests.items()
+        if method == "PATCH"
+    }
+    assert updated_bodies == {
+        f"{base_url}/issues/comments/10": "body2",
+        f"{base_url}/issues/comments/11": "body3",
+    }
+
+
+@pytest.mark.asyncio
+async def test_draft_status_uses_node_id_from_created_pr(mock_aioresponse, platform_service):
+    mock_aioresponse.post(
+        f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}/pulls",
+        payload={"number": 2, "node_id": "node2"},
+        status=201,
+    )
+    mock_aioresponse.post("https://api.github.com/graphql", payload={}, status=200)
+
+    pr_number, _ = await platform_service.create_pr("title", ["body"], True, "branch1", "branch2")
+    await platform_service.set_pr_draft_status(pr_number, False)
+
+    # No GET to look up the node ID
+    requests = list(mock_aioresponse.requests)
+    assert [method for method, _ in requests] == ["POST", "POST"]
+    graphql_request = mock_aioresponse.requests[requests[-1]][0]
+    assert graphql_request.kwargs["json"]["variables"] == {"pullRequestId": "node2"}
+
+
+@pytest.mark.parametrize(
+    "response_text, expected",
+    [
+        ('{"message": "Draft pull requests are not supported in this repository."}', True),
+        ('{"message": "Validation Failed"}', False),
+        ("<html>Bad gateway</html>", False),
+    ],
+)
+def test_is_draft_error(platform_service, response_text, expected):
+    assert platform_service._is_draft_error(response_text) == expected
+    assert platform_service._drafts_supported == (not expected)
+
+
+@pytest.mark.asyncio
+async def test_draft_status_skips_unchanged(mock_aioresponse, platform_service):
+    mock_aioresponse.post(
+        f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}/pulls",
+        payload={"number": 2, "node_id": "node2", "draft": True},
+        status=201,
+    )
+    mock_aioresponse.post("https://api.github.com/graphql", payload={}, status=200)
+
+    pr_number, _ = await platform_service.create_pr("title", ["body"], True, "branch1", "branch2")
+    await platform_service.set_pr_draft_status(pr_number, True)
+    await platform_service.set_pr_draft_status(pr_number, False)
+    await platform_service.set_pr_draft_status(pr_number, False)
+
+    graphql_calls = mock_aioresponse.requests[("POST", URL("https://api.github.com/graphql"))]
+    assert len(graphql_calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_draft_status_graphql_errors_are_failures(mock_aioresponse, platform_service):
+    mock_aioresponse.post(
+        f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}/pulls",
+        payload={"number": 2, "node_id": "node2", "draft": True},
+        status=201,
+    )
+    mock_aioresponse.post(
+        "https://api.github.com/graphql",
+        payload={"data": None, "errors": [{"message": "Resource not accessible"}]},
+        status=200,
+    )
+
+    pr_number, _ = await platform_service.create_pr("title", ["body"], True, "branch1", "branch2")
+    await platform_service.set_pr_draft_status(pr_number, False)
+
+    assert platform_service._pr_draft_statuses[pr_number] is True
+    assert not platform_service._drafts_supported
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_request_is_retried(mock_aioresponse, platform_service):
+    url = (
+        f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}/issues"
+    )
+    mock_aioresponse.post(url, status=429, headers={"Retry-After": "0"})
+    mock_aioresponse.post(url, status=403, headers={"X-RateLimit-Remaining": "0"})
+    mock_aioresponse.post(url, payload={"number": 1}, status=201)
+
+    with patch("asyncio.sleep") as mock_sleep:
+        issue_number = await platform_service.create_issue("test_title", "test_body")
+    assert issue_number == 1
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [0, 2]
+
+
+@pytest.mark.asyncio
+async def test_forbidden_request_is_not_retried(mock_aioresponse, platform_service):
+    url = (
+        f"https://api.github.com/repos/{platform_service.owner}/{platform_service.repo_name}/issues"
+    )
+    mock_aioresponse.post(url, status=403, payload={"message": "Resource not accessible"})
+
+    issue_number = await platform_service.create_issue("test_title", "test_body")
+    assert issue_number is None
+
+
 @pytest.mark.asyncio
 async def test_create_issue(mock_aioresponse, platform_service):
     mock_aioresponse.post(
@@ -294,11 +818,14 @@ async def test_get_issue_by_title(mock_aioresponse, platform_service):
         timestamp="2023-08-18T21:20:59Z",
     )
 
-    with patch("requests.get") as mock_get:
-        mock_get.return_value = Mock(status_code=200, json=lambda: [])
+    mock_aioresponse.get(
+        "https://api.github.com/repos/user/repo/issues/1/comments",
+        payload=[],
+        status=200,
+    )
 
-        issue = await platform_service.get_issue_by_title("test_title")
-        assert issue == expected_issue
+    issue = await platform_service.get_issue_by_title("test_title")
+    assert issue == expected_issue
 
 
 @pytest.mark.parametrize(